@@ -7,10 +7,97 @@ import uuid
 import asyncio
 import re
 import time
+import sqlite3
+import functools
+import cProfile
+import pstats
+
+
+def _await_site(agen) -> str:
+    """沿挂起中的协程 await 链取出用户代码帧（跳过 asyncio），作为等待点标识。"""
+    asyncio_dir = os.path.dirname(asyncio.__file__)
+    names = []
+    obj = agen
+    while obj is not None:
+        frame = getattr(obj, "ag_frame", None) or getattr(obj, "cr_frame", None) or getattr(obj, "gi_frame", None)
+        if frame is not None and not frame.f_code.co_filename.startswith(asyncio_dir):
+            names.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})")
+        obj = getattr(obj, "ag_await", None) or getattr(obj, "cr_await", None) or getattr(obj, "gi_yieldfrom", None)
+    return " -> ".join(names[-3:]) or "<unknown>"
+
+
+class _ProfiledAwaitable:
+    """逐步驱动处理器的一步（agen.__anext__），仅在其自身代码执行时开启 profiler。
+    挂起等待（await I/O）期间 profiler 关闭，事件循环中的其他协程不会被计入；
+    每次挂起的墙钟时长按等待点累计到 waits（{等待点: [秒数, 次数]}）。
+    """
+
+    def __init__(self, agen, prof: cProfile.Profile, waits: dict[str, list]):
+        self._agen = agen
+        self._prof = prof
+        self._waits = waits
+
+    def __await__(self):
+        it = self._agen.__anext__().__await__()
+        step, arg = it.send, None
+        while True:
+            try:
+                self._prof.enable()
+            except Exception:
+                # 其他分析/监控工具占用时本步不采样，但不影响执行
+                pass
+            try:
+                yielded = step(arg)
+            except StopIteration as e:
+                return e.value
+            finally:
+                self._prof.disable()
+            site = _await_site(self._agen)
+            t0 = time.perf_counter()
+            try:
+                arg = yield yielded
+                step = it.send
+            except GeneratorExit:
+                it.close()
+                raise
+            except BaseException as exc:
+                step, arg = it.throw, exc
+            finally:
+                rec = self._waits.setdefault(site, [0.0, 0])
+                rec[0] += time.perf_counter() - t0
+                rec[1] += 1
+
+
+def _profiled(func):
+    """为指令处理器增加按比例采样的性能分析（CPU 用 cProfile，await 等待另计墙钟时长）；未开启时直接透传。"""
+    @functools.wraps(func)
+    async def wrapper(self, event, *args, **kwargs):
+        prof = self._profile_start()
+        if prof is None:
+            async for item in func(self, event, *args, **kwargs):
+                yield item
+            return
+        start = time.perf_counter()
+        waits: dict[str, list] = {}
+        agen = func(self, event, *args, **kwargs)
+        try:
+            while True:
+                try:
+                    item = await _ProfiledAwaitable(agen, prof, waits)
+                except StopAsyncIteration:
+                    break
+                yield item
+        finally:
+            await agen.aclose()
+            self._profiling_active = False
+            self._save_profile(func.__name__, prof, time.perf_counter() - start, waits)
+    return wrapper
 
 
 @register("astrbot_plugin_liuyan", "bvzrays", "留言插件：/留言 与 /回复", "1.0.0")
 class LiuyanPlugin(Star):
+    _STORE_UNAVAILABLE_MSG = "共享工单库暂不可用，留言/回复功能已暂停，请联系管理员检查 shared_store_path 配置与日志。"
+
     def __init__(self, context: Context, config: AstrBotConfig | None = None):
         super().__init__(context)
         self.config: AstrBotConfig | None = config
@@ -19,18 +106,50 @@ class LiuyanPlugin(Star):
         self._data_dir = self._ensure_data_dir()
         self._mapping_path = os.path.join(self._data_dir, "mappings.json")
         self._list_page: dict[str, int] = {}
+        # 共享存储（多实例共用 SQLite）
+        self._db: sqlite3.Connection | None = None
+        self._db_rev = 0
+        self._db_data_version = -1
+        self._db_lock = asyncio.Lock()
+        self._db_retry_at = 0.0
+        # 汇总投递：待转发工单缓冲及其定时刷新任务
+        self._digest_buf: list[dict] = []
+        self._digest_task: asyncio.Task | None = None
+        self._digest_flush_tasks: set[asyncio.Task] = set()
+        # 采样性能分析
+        self._profile_dir = os.path.join(self._data_dir, "profiles")
+        self._profile_enabled = bool(self.config.get("profile_enabled", False)) if self.config else False
+        self._profile_counter = 0
+        self._profiling_active = False
 
     async def initialize(self):
-        """初始化时加载历史映射。"""
+        """初始化时加载历史映射；启用共享存储时改为连接共享库。
+        共享库打开失败时不回退到本地文件（否则会形成与其他实例分离的私有工单池），
+        工单相关指令会提示不可用，并在后续调用时重试连接。
+        """
+        if self._use_shared_store():
+            await self._shared_store_ready()
+            return
         await self._load_mappings()
 
     async def terminate(self):
-        """插件销毁时保存映射。"""
+        """插件销毁时发出缓冲中的汇总并保存映射。"""
+        if self._digest_flush_tasks:
+            await asyncio.gather(*self._digest_flush_tasks, return_exceptions=True)
+        await self._flush_digest(final=True)
+        if self._use_shared_store():
+            # 共享模式下不写本地文件，避免用不完整的内存视图覆盖 mappings.json
+            await self._close_shared_store()
+            return
         await self._save_mappings()
 
     # /留言 <内容>
     @filter.command("留言")
+    @_profiled
     async def cmd_liuyan(self, event: AstrMessageEvent):
+        if not await self._shared_store_ready():
+            yield event.plain_result(self._STORE_UNAVAILABLE_MSG)
+            return
         message = event.message_str.strip()
         # 去掉指令前缀（兼容 /留言 *留言 ！留言 #留言 等，以及可选的 :： 分隔）
         message = self._strip_command_prefix(message, "留言")
@@ -73,7 +192,7 @@ class LiuyanPlugin(Star):
                 "has_images": True if img_srcs_for_store else False,
                 "images": img_srcs_for_store[:3],
             }
-        await self._save_mappings()
+        await self._save_ticket(ticket)
 
         # 组织转发页面（HTML 渲染为图片）
         origin_info = {
@@ -86,6 +205,12 @@ class LiuyanPlugin(Star):
             "content": message,
         }
 
+        # 汇总模式：非紧急留言进入缓冲，达到条数或时间窗口后合并发送
+        if self._digest_enabled() and not self._is_urgent(message):
+            await self._digest_enqueue(dest_umos, origin_info, img_srcs_for_store)
+            yield event.plain_result(f"留言已提交，工单号：{ticket}")
+            return
+
         # 统一发送流程，先走 AstrBot，再走协议端兜底，成功则不提示失败
         is_image = self._should_render_image()
         image_path = None
@@ -135,7 +260,11 @@ class LiuyanPlugin(Star):
 
     # /回复 <工单号> <内容>
     @filter.command("回复")
+    @_profiled
     async def cmd_reply(self, event: AstrMessageEvent):
+        if not await self._shared_store_ready():
+            yield event.plain_result(self._STORE_UNAVAILABLE_MSG)
+            return
         text = event.message_str.strip()
         if not text:
             yield event.plain_result("用法：/回复 工单号 内容")
@@ -151,6 +280,7 @@ class LiuyanPlugin(Star):
         if not reply_text:
             yield event.plain_result("回复内容不能为空。")
             return
+        await self._sync_from_store()
         async with self._lock:
             mapping = self._ticket_map.get(ticket)
 
@@ -214,19 +344,24 @@ class LiuyanPlugin(Star):
                     mp["status"] = "closed"
                     mp["closed_at"] = int(time.time())
                     mp["last_reply"] = reply_text
-            await self._save_mappings()
+            await self._save_ticket(ticket)
             yield event.plain_result("已回送给留言用户。")
         else:
             yield event.plain_result("回复发送失败，请稍后再试。")
 
     @filter.command("留言列表")
+    @_profiled
     async def cmd_list_tickets(self, event: AstrMessageEvent):
+        if not await self._shared_store_ready():
+            yield event.plain_result(self._STORE_UNAVAILABLE_MSG)
+            return
         dests = set(self._get_destination_umos())
         dev_ids = set((self.config.get("developer_user_ids", []) or [])) if self.config else set()
         # 允许：在任一目标会话中，或开发者本人在任意会话中
         if (event.unified_msg_origin not in dests) and (event.get_sender_id() not in dev_ids):
             yield event.plain_result("该指令仅能在留言接收会话中使用。")
             return
+        await self._sync_from_store()
         async with self._lock:
             opens = [
                 (k, v) for k, v in self._ticket_map.items()
@@ -281,12 +416,16 @@ class LiuyanPlugin(Star):
 
     @filter.command("查看留言")
     async def cmd_view_ticket(self, event: AstrMessageEvent):
+        if not await self._shared_store_ready():
+            yield event.plain_result(self._STORE_UNAVAILABLE_MSG)
+            return
         text = event.message_str.strip()
         m = re.search(r"([0-9a-fA-F]{8})", text)
         if not m:
             yield event.plain_result("用法：/查看留言 工单号")
             return
         ticket = m.group(1).lower()
+        await self._sync_from_store()
         async with self._lock:
             mp = self._ticket_map.get(ticket)
         if not mp:
@@ -305,6 +444,28 @@ class LiuyanPlugin(Star):
             chain = chain.file_image(src)
         yield chain
 
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("留言性能")
+    async def cmd_profile(self, event: AstrMessageEvent):
+        """/留言性能 开|关|热点 [N]：切换采样性能分析或查看热点函数。"""
+        text = self._strip_command_prefix(event.message_str.strip(), "留言性能")
+        if text.startswith("开"):
+            self._profile_enabled = True
+            self._profile_counter = 0
+            yield event.plain_result(
+                f"已开启性能采样（每 {self._profile_sample_rate()} 次采样 1 次），结果保存在 {self._profile_dir}"
+            )
+        elif text.startswith("关"):
+            self._profile_enabled = False
+            yield event.plain_result("已关闭性能采样。")
+        elif text.startswith("热点"):
+            nums = re.findall(r"\d+", text)
+            top_n = max(1, min(int(nums[0]), 50)) if nums else 10
+            yield event.plain_result(self._format_profile_top(top_n))
+        else:
+            state = "开启" if self._profile_enabled else "关闭"
+            yield event.plain_result(f"性能采样当前{state}。用法：/留言性能 开|关|热点 [N]")
+
     def _get_destination_umos(self) -> list[str]:
         """根据配置获取目标会话列表：
         - 使用开发者QQ/群号列表自动拼 UMO（{platform}:friend:QQ / {platform}:group:GID）；
@@ -409,15 +570,15 @@ class LiuyanPlugin(Star):
             logger.error(f"直接调用 aiocqhttp 发送失败: {e}")
 
     async def _send_direct_aiocqhttp_image(self, umo: str, image_path: str):
-        """通过 aiocqhttp 直接发送图片（CQ 码）。"""
+        """通过 aiocqhttp 直接发送图片（CQ 码），返回是否已提交给协议端。"""
         try:
             from pathlib import Path
             parts = (umo or "").split(":", 2)
             if len(parts) != 3:
-                return
+                return False
             platform, msg_type, sid = parts
             if platform != "aiocqhttp":
-                return
+                return False
             # 支持 http/https 与本地文件
             if isinstance(image_path, str) and (image_path.startswith("http://") or image_path.startswith("https://")):
                 cq = f"[CQ:image,file={image_path}]"
@@ -426,25 +587,29 @@ class LiuyanPlugin(Star):
                 cq = f"[CQ:image,file={uri}]"
             platform_inst = self.context.get_platform(filter.PlatformAdapterType.AIOCQHTTP)
             if not platform_inst:
-                return
+                return False
             client = platform_inst.get_client()
             if msg_type == "group":
                 await client.api.call_action('send_group_msg', group_id=int(sid), message=cq)
             elif msg_type in {"friend", "private"}:
                 await client.api.call_action('send_private_msg', user_id=int(sid), message=cq)
+            else:
+                return False
+            return True
         except Exception as e:
             logger.error(f"直接调用 aiocqhttp 发送图片失败: {e}")
+            return False
 
     async def _send_direct_aiocqhttp_combo(self, umo: str, text_before: str, image_sources: list[str], text_after: str):
-        """通过 aiocqhttp 一次性发送 文本 + 多图片 + 文本。"""
+        """通过 aiocqhttp 一次性发送 文本 + 多图片 + 文本，返回是否已提交给协议端。"""
         try:
             from pathlib import Path
             parts = (umo or "").split(":", 2)
             if len(parts) != 3:
-                return
+                return False
             platform, msg_type, sid = parts
             if platform != "aiocqhttp":
-                return
+                return False
             pieces = [text_before]
             for src in (image_sources or []):
                 if isinstance(src, str) and (src.startswith("http://") or src.startswith("https://")):
@@ -458,14 +623,18 @@ class LiuyanPlugin(Star):
 
             platform_inst = self.context.get_platform(filter.PlatformAdapterType.AIOCQHTTP)
             if not platform_inst:
-                return
+                return False
             client = platform_inst.get_client()
             if msg_type == "group":
                 await client.api.call_action('send_group_msg', group_id=int(sid), message=msg)
             elif msg_type in {"friend", "private"}:
                 await client.api.call_action('send_private_msg', user_id=int(sid), message=msg)
+            else:
+                return False
+            return True
         except Exception as e:
             logger.error(f"直接调用 aiocqhttp 组合发送失败: {e}")
+            return False
 
     def _extract_image_sources(self, event: AstrMessageEvent):
         try:
@@ -509,6 +678,471 @@ class LiuyanPlugin(Star):
         except Exception as e:
             logger.error(f"保存映射文件失败: {e}")
 
+    async def _save_ticket(self, ticket: str):
+        """持久化单个工单：共享存储模式下只写入该行，否则整体保存映射文件。"""
+        if self._use_shared_store():
+            if self._db is None:
+                logger.error(f"共享工单库不可用，工单 {ticket} 未能保存")
+                return
+        else:
+            await self._save_mappings()
+            return
+        try:
+            async with self._lock:
+                mp = self._ticket_map.get(ticket)
+                if not isinstance(mp, dict):
+                    return
+                payload = json.dumps(mp, ensure_ascii=False)
+            # 等待其他实例释放写锁可能耗时，放到线程中执行，避免阻塞事件循环
+            async with self._db_lock:
+                await asyncio.to_thread(self._store_put, ticket, payload)
+        except Exception as e:
+            logger.error(f"写入共享工单库失败: {e}")
+
+    def _store_put(self, ticket: str, payload: str):
+        db = self._db
+        # BEGIN IMMEDIATE 获取跨进程写锁，保证 rev 单调递增
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT COALESCE(MAX(rev), 0) FROM tickets").fetchone()
+            rev = int(row[0]) + 1
+            db.execute(
+                "INSERT INTO tickets(ticket, data, rev) VALUES (?, ?, ?) "
+                "ON CONFLICT(ticket) DO UPDATE SET data = excluded.data, rev = excluded.rev",
+                (ticket, payload, rev),
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    async def _shared_store_ready(self) -> bool:
+        """共享模式下确认工单库可用；未连接时尝试重新打开（失败后 30 秒内不再重试）。
+        非共享模式始终返回 True。
+        """
+        if not self._use_shared_store() or self._db is not None:
+            return True
+        now = time.time()
+        if now < self._db_retry_at:
+            return False
+        self._db_retry_at = now + 30
+        try:
+            await self._open_shared_store()
+        except Exception as e:
+            logger.error(f"打开共享工单库失败，工单相关指令暂不可用: {e}")
+            await self._close_shared_store()
+            return False
+        await self._sync_from_store()
+        return True
+
+    def _use_shared_store(self) -> bool:
+        try:
+            if not self.config:
+                return False
+            return bool(self.config.get("shared_store", False))
+        except Exception:
+            return False
+
+    def _shared_store_path(self) -> str:
+        path = ""
+        if self.config:
+            path = (self.config.get("shared_store_path", "") or "").strip()
+        return path or os.path.join(self._data_dir, "tickets.db")
+
+    async def _open_shared_store(self):
+        """连接共享 SQLite 工单库，并合并本实例 mappings.json 中尚未入库的工单。"""
+        path = self._shared_store_path()
+        async with self._db_lock:
+            self._db = await asyncio.to_thread(self._store_open, path)
+        self._db_rev = 0
+        self._db_data_version = -1
+        logger.info(f"留言插件使用共享工单库: {path}")
+
+    def _store_open(self, path: str) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # isolation_level=None：手动控制事务；timeout 为等待其他进程写锁的秒数
+        # 连接会在 to_thread 的工作线程间切换使用，由 _db_lock 保证串行
+        db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS tickets ("
+                "ticket TEXT PRIMARY KEY, data TEXT NOT NULL, rev INTEGER NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS idx_tickets_rev ON tickets(rev)")
+        except Exception:
+            db.close()
+            raise
+        try:
+            self._store_merge_local(db)
+        except Exception:
+            db.close()
+            raise
+        return db
+
+    def _store_merge_local(self, db: sqlite3.Connection):
+        """将本实例的 mappings.json 合并进共享库。
+        每个实例启动时都会执行；INSERT OR IGNORE 保证重复合并无副作用，且不会覆盖其他实例写入的工单。
+        """
+        if not os.path.exists(self._mapping_path):
+            return
+        try:
+            with open(self._mapping_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"读取本地映射文件失败，未合并到共享工单库: {e}")
+            return
+        if not isinstance(data, dict):
+            return
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT COALESCE(MAX(rev), 0) FROM tickets").fetchone()
+            rev = int(row[0])
+            imported = 0
+            for k, v in data.items():
+                if not isinstance(v, dict):
+                    continue
+                cur = db.execute(
+                    "INSERT OR IGNORE INTO tickets(ticket, data, rev) VALUES (?, ?, ?)",
+                    (k, json.dumps(v, ensure_ascii=False), rev + 1),
+                )
+                if cur.rowcount:
+                    rev += 1
+                    imported += 1
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        if imported:
+            logger.info(f"已将本地 mappings.json 中的 {imported} 条工单合并到共享工单库")
+
+    async def _close_shared_store(self):
+        async with self._db_lock:
+            db, self._db = self._db, None
+            if db is not None:
+                try:
+                    await asyncio.to_thread(db.close)
+                except Exception:
+                    pass
+
+    async def _sync_from_store(self):
+        """增量拉取其他实例写入的工单。
+        先比较 PRAGMA data_version（其他连接提交后才会变化），未变化时直接返回；
+        变化时只读取 rev 大于本地水位的行，无需整表重载。
+        """
+        if self._db is None:
+            return
+        try:
+            async with self._db_lock:
+                result = await asyncio.to_thread(self._store_fetch, self._db_rev, self._db_data_version)
+            if result is None:
+                return
+            dv, rows = result
+            async with self._lock:
+                for ticket, data, rev in rows:
+                    try:
+                        mp = json.loads(data)
+                    except Exception:
+                        continue
+                    if isinstance(mp, dict):
+                        self._ticket_map[ticket] = mp
+                    self._db_rev = max(self._db_rev, int(rev))
+            self._db_data_version = dv
+        except Exception as e:
+            logger.error(f"同步共享工单库失败: {e}")
+
+    def _store_fetch(self, since_rev: int, last_data_version: int) -> tuple[int, list] | None:
+        """返回 (data_version, 新增行)；库自上次检查后无变化时返回 None。"""
+        db = self._db
+        if db is None:
+            return None
+        dv = int(db.execute("PRAGMA data_version").fetchone()[0])
+        if dv == last_data_version:
+            return None
+        rows = db.execute(
+            "SELECT ticket, data, rev FROM tickets WHERE rev > ? ORDER BY rev",
+            (since_rev,),
+        ).fetchall()
+        return dv, rows
+
+    def _digest_enabled(self) -> bool:
+        try:
+            if not self.config:
+                return False
+            return bool(self.config.get("digest_mode", False))
+        except Exception:
+            return False
+
+    def _digest_limits(self) -> tuple[int, float]:
+        """返回 (每批最大条数, 时间窗口秒数)。"""
+        size, window = 10, 60.0
+        try:
+            size = max(1, int(self.config.get("digest_max_size", 10) or 10))
+            window = max(1.0, float(self.config.get("digest_window_seconds", 60) or 60))
+        except Exception:
+            pass
+        return size, window
+
+    def _is_urgent(self, message: str) -> bool:
+        """留言包含紧急关键词时跳过汇总缓冲，立即转发。"""
+        keywords = ["紧急", "加急"]
+        try:
+            if self.config and self.config.get("digest_urgent_keywords") is not None:
+                keywords = self.config.get("digest_urgent_keywords") or []
+        except Exception:
+            pass
+        return any(isinstance(k, str) and k.strip() and k.strip() in message for k in keywords)
+
+    async def _digest_enqueue(self, dest_umos: list[str], info: dict, image_sources: list[str]):
+        """将工单加入汇总缓冲；首条启动时间窗口计时，满批则立即在后台刷新。"""
+        self._digest_buf.append({
+            "info": info,
+            "images": list(image_sources or []),
+            "dests": list(dest_umos),
+            "attempts": 0,
+        })
+        size, window = self._digest_limits()
+        if len(self._digest_buf) >= size:
+            # 满批在后台发送，避免提交留言的用户等待整批渲染与投递
+            task = asyncio.create_task(self._flush_digest())
+            self._digest_flush_tasks.add(task)
+            task.add_done_callback(self._digest_flush_tasks.discard)
+            return
+        self._schedule_digest(window)
+
+    def _schedule_digest(self, window: float):
+        if self._digest_task is None or self._digest_task.done():
+            self._digest_task = asyncio.create_task(self._digest_timer(window))
+
+    async def _digest_timer(self, window: float):
+        try:
+            await asyncio.sleep(window)
+            await self._flush_digest()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"留言汇总定时发送失败: {e}")
+
+    async def _flush_digest(self, final: bool = False):
+        """将缓冲中的工单合并发送：同一批目标会话只渲染一次，再逐个会话投递。
+        全部会话均发送失败时将该批重新入队（最多重试 2 次），放弃时记录丢弃的工单号。
+        """
+        task = self._digest_task
+        self._digest_task = None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        items, self._digest_buf = self._digest_buf, []
+        if not items:
+            return
+
+        # 按目标会话分组（配置未变更时只有一组）
+        groups: dict[tuple[str, ...], list[dict]] = {}
+        for it in items:
+            groups.setdefault(tuple(it["dests"]), []).append(it)
+
+        failed: list[dict] = []
+        for dests, batch in groups.items():
+            if not await self._send_digest_batch(list(dests), batch):
+                failed.extend(batch)
+        if not failed:
+            return
+
+        tickets = [it["info"].get("ticket", "") for it in failed]
+        retry = [it for it in failed if it["attempts"] < 2]
+        dropped = [it["info"].get("ticket", "") for it in failed if it["attempts"] >= 2]
+        if final:
+            retry, dropped = [], tickets
+        if dropped:
+            logger.error(f"留言汇总发送失败，已放弃以下工单的转发（可用 /留言列表 查看）: {dropped}")
+        if retry:
+            for it in retry:
+                it["attempts"] += 1
+            logger.warn(f"留言汇总发送失败，稍后重试: {[it['info'].get('ticket', '') for it in retry]}")
+            self._digest_buf[:0] = retry
+            self._schedule_digest(self._digest_limits()[1])
+
+    async def _send_digest_batch(self, dest_umos: list[str], items: list[dict]) -> bool:
+        """渲染一次汇总消息并发送至所有目标会话，任一会话成功即返回 True。
+        render_image 开启时使用带内容摘要的工单列表卡片；文本模式下 aiocqhttp 直接走协议端组合发送，
+        避免 AstrBot 丢失图片后的文本，其余平台使用文本+图片消息链。
+        """
+        is_image = self._should_render_image()
+        image_path = None
+        all_imgs = [src for it in items for src in it["images"]]
+        card_chain = None
+        if is_image:
+            try:
+                async with self._lock:
+                    pairs = [
+                        (it["info"]["ticket"], self._ticket_map.get(it["info"]["ticket"]) or it["info"])
+                        for it in items
+                    ]
+                image_path = await self._render_ticket_list_image(pairs, with_content=True)
+                card_chain = MessageChain().file_image(image_path)
+                for src in all_imgs:
+                    card_chain = card_chain.file_image(src)
+            except Exception as e:
+                logger.error(f"留言汇总卡片渲染失败，降级为文本: {e}")
+                is_image = False
+
+        header = f"[留言汇总] 共 {len(items)} 条"
+        text_chain = None
+        combo_text = ""
+        if not is_image:
+            texts = [header]
+            text_chain = MessageChain().message(header + "\n")
+            for it in items:
+                before, after = self._format_liuyan_text_parts(it["info"])
+                note = f"（附图 {len(it['images'])} 张，见文末）\n" if it["images"] else ""
+                texts.append(before + note + after)
+                text_chain = text_chain.message("\n" + before)
+                for src in it["images"]:
+                    text_chain = text_chain.file_image(src)
+                text_chain = text_chain.message("\n" + after + "\n")
+            combo_text = "\n\n".join(texts) + "\n"
+
+        sent_any = False
+        for umo in dest_umos:
+            is_aiocqhttp = umo.split(":", 1)[0] == "aiocqhttp"
+            chain = card_chain if is_image else (None if is_aiocqhttp else text_chain)
+            if chain is not None:
+                try:
+                    ok = await self.context.send_message(umo, chain)
+                    if ok is True:
+                        sent_any = True
+                        continue
+                except Exception:
+                    pass
+            # AstrBot 发送失败或文本模式，走协议端
+            if is_image and image_path:
+                ok = await self._send_direct_aiocqhttp_image(umo, image_path)
+                for src in all_imgs:
+                    await self._send_direct_aiocqhttp_image(umo, src)
+            else:
+                ok = await self._send_direct_aiocqhttp_combo(umo, combo_text, all_imgs, "")
+            sent_any = sent_any or bool(ok)
+        return sent_any
+
+    def _profile_sample_rate(self) -> int:
+        try:
+            return max(1, int(self.config.get("profile_sample_rate", 20) or 20))
+        except Exception:
+            return 20
+
+    def _profile_start(self) -> cProfile.Profile | None:
+        """按 1/N 比例决定本次调用是否采样，返回可用的 profiler；不采样时返回 None。
+        同一时间只允许一个采样中的调用；profiler 无法启用（如已有其他分析工具）时跳过本次采样。
+        """
+        if not self._profile_enabled or self._profiling_active:
+            return None
+        self._profile_counter += 1
+        if self._profile_counter % self._profile_sample_rate() != 0:
+            return None
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+            prof.disable()
+        except Exception as e:
+            logger.warn(f"无法启用性能采样，已跳过本次: {e}")
+            return None
+        self._profiling_active = True
+        return prof
+
+    def _save_profile(self, name: str, prof: cProfile.Profile, elapsed: float, waits: dict[str, list]):
+        """写入 .pstats（CPU）与同名 .waits.json（await 等待），并只保留最近 profile_keep 组。"""
+        try:
+            os.makedirs(self._profile_dir, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(
+                self._profile_dir, f"{stamp}-{name}-{int(elapsed * 1000)}ms-{uuid.uuid4().hex[:4]}.pstats"
+            )
+            prof.dump_stats(path)
+            wait_total = sum(v[0] for v in waits.values())
+            with open(path[:-len(".pstats")] + ".waits.json", "w", encoding="utf-8") as f:
+                json.dump({"handler": name, "elapsed": elapsed, "waits": waits}, f, ensure_ascii=False, indent=2)
+            logger.info(
+                f"已采样 {name}，墙钟 {elapsed * 1000:.1f}ms（其中 await 等待 {wait_total * 1000:.1f}ms），写入 {path}"
+            )
+
+            try:
+                keep = max(1, int(self.config.get("profile_keep", 20) or 20))
+            except Exception:
+                keep = 20
+            files = sorted(
+                (os.path.join(self._profile_dir, f) for f in os.listdir(self._profile_dir) if f.endswith(".pstats")),
+                key=os.path.getmtime,
+            )
+            for old in files[:-keep]:
+                os.remove(old)
+                sidecar = old[:-len(".pstats")] + ".waits.json"
+                if os.path.exists(sidecar):
+                    os.remove(sidecar)
+        except Exception as e:
+            logger.error(f"保存性能分析文件失败: {e}")
+
+    def _format_profile_top(self, top_n: int) -> str:
+        """合并已保存的采样：分别列出 await 等待最久的等待点与 CPU 累计耗时最高的函数
+        （CPU 部分不含 asyncio 与采样包装自身的帧）。
+        """
+        try:
+            files = [
+                os.path.join(self._profile_dir, f)
+                for f in os.listdir(self._profile_dir) if f.endswith(".pstats")
+            ] if os.path.isdir(self._profile_dir) else []
+            if not files:
+                return "暂无性能采样数据。"
+            elapsed_total = 0.0
+            waits: dict[str, list] = {}
+            for path in files:
+                try:
+                    with open(path[:-len(".pstats")] + ".waits.json", "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except Exception:
+                    continue
+                elapsed_total += float(data.get("elapsed", 0) or 0)
+                for site, (secs, count) in (data.get("waits") or {}).items():
+                    rec = waits.setdefault(site, [0.0, 0])
+                    rec[0] += secs
+                    rec[1] += count
+            stats = pstats.Stats(*files)
+            stats.sort_stats("cumulative")
+            wait_total = sum(v[0] for v in waits.values())
+
+            line = "================="
+            lines = [
+                f"性能采样（{len(files)} 个采样）：墙钟 {elapsed_total * 1000:.1f}ms，"
+                f"其中 await 等待 {wait_total * 1000:.1f}ms，CPU {stats.total_tt * 1000:.1f}ms",
+                line,
+                f"await 等待 Top {top_n}（墙钟，含渲染/发送/数据库等 I/O）",
+            ]
+            for i, (site, (secs, count)) in enumerate(
+                sorted(waits.items(), key=lambda x: x[1][0], reverse=True)[:top_n], 1
+            ):
+                lines.append(f"{i}. {site}")
+                lines.append(f"等待 {secs * 1000:.1f}ms | {count} 次")
+            if not waits:
+                lines.append("（无）")
+            lines.append(line)
+            lines.append(f"CPU 热点函数 Top {top_n}（仅处理器自身 CPU 时间，不含 await 等待）")
+            asyncio_dir = os.path.dirname(asyncio.__file__)
+            keys = [
+                k for k in stats.fcn_list
+                if not k[0].startswith(asyncio_dir)
+                and not (k[0] == __file__ and k[2] in {"__await__", "wrapper"})
+                and "_lsprof" not in k[2]
+                and "async_generator" not in k[2]
+            ]
+            for i, key in enumerate(keys[:top_n], 1):
+                filename, lineno, funcname = key
+                _cc, nc, tt, ct, _callers = stats.stats[key]
+                lines.append(f"{i}. {funcname} ({os.path.basename(filename)}:{lineno})")
+                lines.append(f"累计 {ct * 1000:.1f}ms | 自身 {tt * 1000:.1f}ms | 调用 {nc} 次")
+            lines.append(line)
+            return "\n".join(lines)
+        except Exception as e:
+            logger.error(f"读取性能分析文件失败: {e}")
+            return "读取性能采样数据失败。"
+
     def _should_render_image(self) -> bool:
         try:
             if not self.config:
@@ -658,17 +1292,23 @@ class LiuyanPlugin(Star):
             """
         )
 
-    async def _render_ticket_list_image(self, items: list[tuple[str, dict]]) -> str:
-        """渲染未处理工单列表为图片。"""
+    async def _render_ticket_list_image(self, items: list[tuple[str, dict]], with_content: bool = False) -> str:
+        """渲染未处理工单列表为图片；with_content 为 True 时附带留言内容摘要（用于汇总投递）。"""
         tmpl = self._list_template()
         # 组装显示数据
         data_items = []
         for tid, mp in items:
+            content = ""
+            if with_content:
+                content = (mp.get('content', '') or '')[:200]
+                if mp.get('has_images'):
+                    content = (content + ' [图片]') if content else '[图片]'
             data_items.append({
                 "title": f"工单 {tid}",
                 "version": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mp.get("created_at", 0))),
                 "behavior": f"来自 {mp.get('sender_name','')}({mp.get('sender_id','')})",
                 "desc": f"会话：{(mp.get('group_name','') + '（' + mp.get('group_id','') + '）') if mp.get('group_name') else (mp.get('group_id','私聊'))}",
+                "content": content,
             })
         path = await self.html_render(tmpl, {"items": data_items}, return_url=False, options={
             "type": "png",
@@ -696,6 +1336,7 @@ class LiuyanPlugin(Star):
     .plugin-icon { margin-left: auto; display:flex; align-items:center; }
     .plugin-icon i { margin-left: 10px; font-size: 20px; }
     .sep { margin: 10px 0; height:1px; background:#555; }
+    .plugin-content { margin-top: 10px; font-size: 14px; line-height: 1.6; color: #e5e7eb; white-space: pre-wrap; word-break: break-all; }
   </style>
   </head>
 <body>
@@ -710,6 +1351,7 @@ class LiuyanPlugin(Star):
       <div class='plugin-behavior'>{{ it.behavior }}</div>
       <div class='sep'></div>
       <div class='plugin-description'>{{ it.desc }}</div>
+      {% if it.content %}<div class='plugin-content'>{{ it.content }}</div>{% endif %}
     </div>
     {% endfor %}
   </div>